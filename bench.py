@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import statistics
+import sys
+import time
+import traceback
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+from days import ROOT, check, find_days, load_day, run_day
+
+HISTORY = ROOT / ".bench_history.json"
+
+
+def load_history(path):
+    if not path.exists():
+        return {}
+
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_history(path, history):
+    with open(path, "w") as f:
+        json.dump(history, f, indent=2)
+
+
+def bench_day(n, warmup, repeat):
+    """Time day `n` in-process, returning its run times and last output."""
+    module = load_day(n)
+    for _ in range(warmup):
+        run_day(module, n)
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = run_day(module, n)
+        times.append(time.perf_counter() - start)
+
+    return times, output
+
+
+def baseline(runs, window):
+    """Median of the best times of the last `window` recorded runs."""
+    if not runs:
+        return None
+
+    return statistics.median(run["best"] for run in runs[-window:])
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        description="Time the Python solutions and check them against their answers"
+    )
+    parser.add_argument("days", nargs="*", type=int, help="days to run, all by default")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs first")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="fail when a day is this much slower than its baseline",
+    )
+    parser.add_argument(
+        "--slack",
+        type=float,
+        default=0.005,
+        help="seconds of slowdown always tolerated, for days that run in no time",
+    )
+    parser.add_argument(
+        "--window", type=int, default=5, help="recorded runs making up the baseline"
+    )
+    parser.add_argument("--history", type=Path, default=HISTORY)
+    parser.add_argument(
+        "--no-record", action="store_true", help="don't add this run to the history"
+    )
+    args = parser.parse_args(argv[1:])
+
+    history = load_history(args.history)
+    now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    failed = False
+
+    print(
+        f"{'day':>4} {'best':>10} {'median':>10} {'baseline':>10} {'change':>8}  status"
+    )
+    for n in args.days or find_days():
+        try:
+            times, output = bench_day(n, args.warmup, args.repeat)
+        except Exception:
+            traceback.print_exc()
+            print(f"{n:>4} {'':>10} {'':>10} {'':>10} {'':>8}  error")
+            failed = True
+            continue
+
+        best = min(times)
+        runs = history.setdefault(str(n), [])
+        base = baseline(runs, args.window)
+
+        correct = check(n, output)
+        if correct is False:
+            status = "wrong answer"
+        elif base is not None and best > base * (1 + args.threshold) + args.slack:
+            status = "slower"
+        elif correct is None:
+            status = "unchecked"
+        else:
+            status = "ok"
+        failed |= status in ("wrong answer", "slower")
+
+        change = f"{100 * (best / base - 1):+.1f}%" if base else ""
+        base = f"{1000 * base:.1f}ms" if base else ""
+        print(
+            f"{n:>4} {1000 * best:>8.1f}ms {1000 * statistics.median(times):>8.1f}ms"
+            f" {base:>10} {change:>8}  {status}"
+        )
+
+        # Runs that failed are left out so that a slowdown doesn't drag the
+        # baseline along with it until accepted with a looser --threshold
+        if status not in ("wrong answer", "slower"):
+            runs.append({"date": now, "best": best, "times": times})
+
+    if not args.no_record:
+        save_history(args.history, history)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
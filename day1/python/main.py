@@ -1,6 +1,12 @@
 #!/usr/bin/env python3
 import sys
 
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from parsecache import load_ints  # noqa: E402
+
 
 def calc_fuel(mass):
     return mass // 3 - 2
@@ -17,8 +23,7 @@ def total_fuel(mass):
 
 
 def main(argv):
-    with open(argv[1], "r") as f:
-        masses = [int(line) for line in f]
+    masses = load_ints(argv[1])
 
     print(sum(calc_fuel(mass) for mass in masses))
     print(sum(total_fuel(mass) for mass in masses))
@@ -3,58 +3,160 @@ import math
 import sys
 
 from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 
-Point = namedtuple("Point", ["x", "y"])
+import numpy as np
 
+Point = namedtuple("Point", ["x", "y"])
 
-def is_point_on_line(origin, dest, test):
-    if dest.x == origin.x:
-        return True
+# Number of asteroid pairs handled by one NumPy chunk
+CHUNK_PAIRS = 1 << 22
 
-    a = (dest.y - origin.y) / (dest.x - origin.x)
-    # (y - y_0) = a * (x - x_0) => y = a * x - (a * x_0 + y_0)
-    b = a * origin.x + origin.y
-    return math.isclose(test.y, a * test.x + b)
 
+def direction(origin, dest):
+    """Direction from `origin` to `dest` as a vector reduced by its gcd.
 
-def distance(origin, dest):
-    return math.sqrt((dest.x - origin.x) ** 2 + (dest.y - origin.y) ** 2)
+    Two asteroids are on the same line of sight exactly when their
+    directions are equal, with no floating point involved.
+    """
+    dx, dy = dest.x - origin.x, dest.y - origin.y
+    g = math.gcd(dx, dy)
+    return dx // g, dy // g
 
 
 def num_visible(origin, asteroids):
-    count = 0
-    for dest in asteroids:
-        if dest == origin:
-            continue
-
-        visible = True
-        for test in asteroids:
-            if test == origin or test == dest:
-                continue
-
-            on_line = is_point_on_line(origin, dest, test)
-            closer = distance(origin, dest) > distance(origin, test)
-            if on_line and closer:
-                visible = False
-
-        if visible:
-            count += 1
-
-    print(origin, count)
-    return count
-
-
-def slope(origin, dest):
-    if dest.x != origin.x:
-        return (dest.y - origin.y) / (dest.x - origin.x)
-    else:
-        return float("inf")
-
-
-def visible(origin, asteroids):
-    ret = len({slope(origin, dest) for dest in asteroids if dest != origin})
-    print(origin, ret)
-    return ret
+    return len({direction(origin, dest) for dest in asteroids if dest != origin})
+
+
+class Field:
+    """Asteroid positions flattened into indices of one occupancy array.
+
+    Positions are numbered `y * stride + x`, with the stride leaving room
+    for every offset between two asteroids to also be numbered uniquely,
+    as `dy * stride + dx`. The gcd of every such offset is looked up in a
+    table, which is much cheaper than computing it for every pair.
+    """
+
+    def __init__(self, asteroids):
+        xs = np.array([a.x for a in asteroids], dtype=np.int64)
+        ys = np.array([a.y for a in asteroids], dtype=np.int64)
+        xs -= xs.min()
+        ys -= ys.min()
+        width, height = xs.max() + 1, ys.max() + 1
+
+        self.stride = 2 * width - 1
+        # Offsets between positions go up to twice the number of cells
+        dtype = np.int32 if 2 * height * self.stride < 1 << 31 else np.int64
+        self.pos = (ys * self.stride + xs).astype(dtype)
+        self.occupied = np.zeros(height * self.stride, dtype=bool)
+        self.occupied[self.pos] = True
+
+        # gcds[center + dy * stride + dx] is gcd(dx, dy)
+        dy = np.arange(-height + 1, height)
+        dx = np.arange(-width + 1, width)
+        self.center = (height - 1) * self.stride + width - 1
+        self.gcds = np.gcd.outer(dy, dx).ravel().astype(dtype)
+
+    def __len__(self):
+        return len(self.pos)
+
+    def blocked_pairs(self, rows):
+        """Pairs i < j, with i one of `rows`, that can't see each other.
+
+        Returned as indices into `rows` and offsets from `rows[0] + 1`. The
+        offset between two asteroids divided by its gcd g is the smallest
+        step along their line of sight that lands on the grid, so they see
+        each other unless there is an asteroid at one of the g - 1 points
+        stepped through in between.
+        """
+        n = len(self) - rows[0] - 1
+        offsets = self.pos[None, rows[0] + 1 :] - self.pos[rows, None]
+        g = self.gcds[offsets + self.center]
+        # Only pairs with j > i count, which excludes part of the first
+        # columns
+        lead = min(len(rows), n)
+        g[:, :lead] *= np.arange(lead)[None, :] >= np.arange(len(rows))[:, None]
+
+        pairs = np.flatnonzero(g > 1)
+        g = g.ravel()[pairs]
+        step = offsets.ravel()[pairs] // g
+        p = self.pos[rows[pairs // n]]
+        blocked = []
+        k = 1
+        while len(pairs):
+            p = p + step
+            hit = self.occupied[p]
+            blocked.append(pairs[hit])
+
+            # Carry on with the pairs that still have points in between
+            keep = ~hit & (g > k + 1)
+            pairs, g, p, step = pairs[keep], g[keep], p[keep], step[keep]
+            k += 1
+
+        blocked = np.concatenate(blocked) if blocked else pairs
+        return blocked // n, blocked % n
+
+    def count_chunk(self, rows):
+        """Partial visible counts of every asteroid from the pairs of `rows`."""
+        first = rows[0] + 1
+        cols = np.arange(first, len(self))
+        r, c = self.blocked_pairs(rows)
+
+        counts = np.zeros(len(self), dtype=np.int64)
+        counts[rows] += len(self) - 1 - rows - np.bincount(r, minlength=len(rows))
+        counts[first:] += np.minimum(cols - rows[0], len(rows)) - np.bincount(
+            c, minlength=len(cols)
+        )
+        return counts
+
+
+# Set in each worker process by _init_worker
+_field = None
+
+
+def _init_worker(field):
+    global _field
+    _field = field
+
+
+def _count_chunk(rows):
+    return _field.count_chunk(rows)
+
+
+def _chunks(n):
+    # Rows further down pair with fewer columns, so take more of them
+    start = 0
+    while start < n:
+        step = max(1, CHUNK_PAIRS // max(1, n - start))
+        yield np.arange(start, min(start + step, n))
+        start += step
+
+
+def visible_counts(asteroids, workers=None):
+    """Number of asteroids visible from each asteroid, in the given order.
+
+    Visibility is symmetric, so each pair is only looked at once. Pairs are
+    handled in chunks of rows, across a process pool if `workers` is given.
+    """
+    if not asteroids:
+        return []
+
+    field = Field(asteroids)
+    if workers is None:
+        return sum(field.count_chunk(rows) for rows in _chunks(len(field))).tolist()
+
+    with ProcessPoolExecutor(
+        workers, initializer=_init_worker, initargs=(field,)
+    ) as pool:
+        return sum(pool.map(_count_chunk, _chunks(len(field)))).tolist()
+
+
+def best_station(asteroids, workers=None):
+    """The asteroid seeing the most others, and how many it sees."""
+    asteroids = list(asteroids)
+    counts = visible_counts(asteroids, workers)
+    best = max(range(len(asteroids)), key=counts.__getitem__)
+    return asteroids[best], counts[best]
 
 
 def main(argv):
@@ -66,10 +168,8 @@ def main(argv):
             if cell == "#"
         }
 
-    print(len(asteroids))
-    #print(sorted(asteroids))
-    best = max(visible(origin, asteroids) for origin in asteroids)
-    print(best)
+    _, count = best_station(sorted(asteroids))
+    print(count)
 
 
 if __name__ == "__main__":
@@ -1,104 +1,159 @@
 #!/usr/bin/env python3
-import itertools
 import re
 import sys
 
-from copy import deepcopy
+from concurrent.futures import ProcessPoolExecutor
 from functools import reduce
 from math import gcd
 
+import numpy as np
 
-class Vec3D:
-    def __init__(self, x, y, z):
-        self.x = x
-        self.y = y
-        self.z = z
+# Largest system for which comparing every pair of bodies beats sorting
+PAIRWISE_MAX_BODIES = 32
 
-    def __add__(self, other):
-        return Vec3D(self.x + other.x, self.y + other.y, self.z + other.z)
 
-    def __repr__(self):
-        return f"(x={self.x}, y={self.y}, z={self.z})"
+def pairwise_gravity(pos):
+    """Velocity change of every body, comparing all pairs in O(n^2)."""
+    return np.sign(pos[None, :, :] - pos[:, None, :]).sum(axis=1)
 
-    def __eq__(self, other):
-        return self.x == other.x and self.y == other.y and self.z == other.z
 
-    def energy(self):
-        return abs(self.x) + abs(self.y) + abs(self.z)
+def ranked_gravity(pos):
+    """Velocity change of every body from sorted ranks in O(n log n).
+
+    Along each axis a body speeds up by one for every body above it and
+    slows down by one for every body below it. Once the axis is sorted,
+    those are the number of bodies after and before the run of equal
+    positions the body falls in.
+    """
+    n = len(pos)
+    dv = np.empty_like(pos)
+    new = np.empty(n, dtype=bool)
+    for i in range(pos.shape[1]):
+        order = np.argsort(pos[:, i])
+        ranked = pos[order, i]
+
+        # Where each run of equal positions starts and ends
+        new[0] = True
+        np.not_equal(ranked[1:], ranked[:-1], out=new[1:])
+        starts = np.flatnonzero(new)
+        ends = np.append(starts[1:], n)
+        run = np.cumsum(new) - 1
+
+        dv[order, i] = (n - ends[run]) - starts[run]
+
+    return dv
+
 
+class System:
+    """Bodies pulling on each other along every axis independently.
 
-class Moon:
-    def __init__(self, pos):
-        self.pos = pos
-        self.vel = Vec3D(0, 0, 0)
+    Positions and velocities are integer arrays with a row per body and a
+    column per axis.
+    """
+
+    def __init__(self, pos, vel=None):
+        self.pos = np.array(pos, dtype=np.int64)
+        if vel is None:
+            self.vel = np.zeros_like(self.pos)
+        else:
+            self.vel = np.array(vel, dtype=np.int64)
 
     def __repr__(self):
-        return f"Moon(pos={self.pos}, vel={self.vel})"
+        return f"System(pos={self.pos.tolist()}, vel={self.vel.tolist()})"
 
-    def update_gravity(self, other):
-        def delta(x0, x1):
-            if x0 > x1:
-                return -1
-            elif x1 > x0:
-                return 1
-            else:
-                return 0
+    def copy(self):
+        return System(self.pos, self.vel)
 
-        self.vel.x += delta(self.pos.x, other.pos.x)
-        self.vel.y += delta(self.pos.y, other.pos.y)
-        self.vel.z += delta(self.pos.z, other.pos.z)
+    def axis(self, i):
+        """The independent subsystem made of axis `i` alone."""
+        return System(self.pos[:, i : i + 1], self.vel[:, i : i + 1])
 
-    def apply_velocity(self):
-        self.pos += self.vel
+    def gravity(self):
+        """Velocity change of every body: bodies above it less bodies below."""
+        if len(self.pos) <= PAIRWISE_MAX_BODIES:
+            return pairwise_gravity(self.pos)
 
-    def potential_energy(self):
-        return self.pos.energy()
+        return ranked_gravity(self.pos)
 
-    def kinetic_energy(self):
-        return self.vel.energy()
+    def step(self, steps=1):
+        for _ in range(steps):
+            self.vel += self.gravity()
+            self.pos += self.vel
 
-    def total_energy(self):
-        return self.potential_energy() * self.kinetic_energy()
+    def run(self, steps):
+        """Step `steps` times, returning the states after each step.
 
+        Positions and velocities are returned as arrays indexed by step,
+        body and axis, so that whole runs can be searched at once.
+        """
+        pos = np.empty((steps,) + self.pos.shape, dtype=np.int64)
+        vel = np.empty_like(pos)
+        for t in range(steps):
+            self.vel += self.gravity()
+            self.pos += self.vel
+            pos[t] = self.pos
+            vel[t] = self.vel
 
-def step(moons):
-    for m0, m1 in itertools.combinations_with_replacement(moons, 2):
-        m0.update_gravity(m1)
-        m1.update_gravity(m0)
+        return pos, vel
 
-    for m in moons:
-        m.apply_velocity()
+    def energy(self):
+        potential = np.abs(self.pos).sum(axis=1)
+        kinetic = np.abs(self.vel).sum(axis=1)
+        return int((potential * kinetic).sum())
 
 
 def lcm(*n):
     return reduce(lambda a, b: a * b // gcd(a, b), n)
 
 
-def find_cycle(moons):
-    def _find_cycle(start):
-        moons = deepcopy(start)
+def period(system, chunk=10000):
+    """Number of steps until the system first returns to its current state.
+
+    Steps are taken in chunks, each searched at once. The dynamics are
+    reversible, and a system at rest at step 0 mirrors its own trajectory
+    around every later step k where it is at rest again, so its period is
+    2k, or k if it is back at its start by then. Such a system is only
+    simulated until the first of those steps.
+    """
+    start = system
+    system = system.copy()
+    at_rest = not start.vel.any()
+    t = 0
+    while True:
+        pos, vel = system.run(chunk)
+        if at_rest:
+            found = (vel == 0).all(axis=(1, 2))
+        else:
+            found = ((pos == start.pos) & (vel == start.vel)).all(axis=(1, 2))
+
+        if found.any():
+            i = int(found.argmax())
+            k = t + i + 1
+            if at_rest and not np.array_equal(pos[i], start.pos):
+                return 2 * k
+
+            return k
+
+        t += chunk
 
-        step(moons)
-        count = 1
-        while not all(m.pos == s.pos and m.vel == s.vel for m, s in zip(moons, start)):
-            step(moons)
-            count += 1
 
-        return count
+def find_cycle(system, workers=None):
+    """Number of steps until the whole system first repeats.
 
-    # Calculate each axis separately
-    x_moons = [Moon(Vec3D(m.pos.x, 0, 0)) for m in moons]
-    x_steps = _find_cycle(x_moons)
-    y_moons = [Moon(Vec3D(0, m.pos.y, 0)) for m in moons]
-    y_steps = _find_cycle(y_moons)
-    z_moons = [Moon(Vec3D(0, 0, m.pos.z)) for m in moons]
-    z_steps = _find_cycle(z_moons)
+    Each axis evolves independently and so repeats with its own period,
+    and the system repeats after their lcm. The axes are searched one
+    after another, or across a process pool if `workers` is given.
+    """
+    axes = [system.axis(i) for i in range(system.pos.shape[1])]
+    if workers is None:
+        return lcm(*map(period, axes))
 
-    return lcm(x_steps, y_steps, z_steps)
+    with ProcessPoolExecutor(workers) as pool:
+        return lcm(*pool.map(period, axes))
 
 
 def main(argv):
-    moons = []
+    pos = []
     line_re = re.compile(r"^<x=(?P<x>-?\d+), y=(?P<y>-?\d+), z=(?P<z>-?\d+)>$")
     with open(argv[1], "r") as f:
         for line in f:
@@ -110,15 +165,15 @@ def main(argv):
             x = int(m.group("x"))
             y = int(m.group("y"))
             z = int(m.group("z"))
-            moons.append(Moon(Vec3D(x, y, z)))
+            pos.append((x, y, z))
 
-    part_1_moons = deepcopy(moons)
-    for _ in range(1000):
-        step(part_1_moons)
-    print(sum(m.total_energy() for m in part_1_moons))
+    moons = System(pos)
+    part_1_moons = moons.copy()
+    part_1_moons.step(1000)
+    print(part_1_moons.energy())
 
-    part_2_moons = deepcopy(moons)
-    print(find_cycle(part_2_moons))
+    # One worker for each axis
+    print(find_cycle(moons, workers=len(pos[0])))
 
 
 if __name__ == "__main__":
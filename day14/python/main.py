@@ -2,25 +2,99 @@
 import re
 import sys
 
-from collections import defaultdict
 
+class Reactions:
+    """Recipes compiled to integer chemical IDs.
 
-def produce(amount, product, recipes, stock):
-    if product == "ORE":
-        return
+    Chemical i is made `per_batch[i]` at a time from the ingredients
+    `ingredients[start[i]:start[i + 1]]`, needing the matching `amounts`.
+    `order` lists the chemicals the product is made from, each before all
+    of its ingredients, so one pass over it resolves any amount of product.
+    """
 
-    per_batch, recipe = recipes[product]
-    required = amount - stock[product]
+    def __init__(self, recipes, product="FUEL"):
+        self.names = ["ORE"] + sorted(recipes)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        self.product = self.ids[product]
 
-    if required > 0:
-        batches, r = divmod(required, per_batch)
-        batches += 1 if r else 0
+        self.per_batch = [1]
+        self.start = [0, 0]
+        self.ingredients = []
+        self.amounts = []
+        for name in self.names[1:]:
+            per_batch, recipe = recipes[name]
+            self.per_batch.append(per_batch)
+            for amount, ingredient in recipe:
+                self.ingredients.append(self.ids[ingredient])
+                self.amounts.append(amount)
+            self.start.append(len(self.ingredients))
 
-        for a, i in recipe:
-            produce(a * batches, i, recipes, stock)
-            stock[i] -= a * batches
+        self.order = self._order()
 
-        stock[product] += batches * per_batch
+    def recipe(self, i):
+        return range(self.start[i], self.start[i + 1])
+
+    def _order(self):
+        # Only chemicals the product is made from take part, and each of
+        # them is ready once every reaction using it has been ordered
+        reachable = {self.product}
+        stack = [self.product]
+        users = [0] * len(self.names)
+        while stack:
+            for k in self.recipe(stack.pop()):
+                ingredient = self.ingredients[k]
+                users[ingredient] += 1
+                if ingredient not in reachable:
+                    reachable.add(ingredient)
+                    stack.append(ingredient)
+
+        order = []
+        ready = [self.product]
+        while ready:
+            i = ready.pop()
+            order.append(i)
+            for k in self.recipe(i):
+                ingredient = self.ingredients[k]
+                users[ingredient] -= 1
+                if users[ingredient] == 0:
+                    ready.append(ingredient)
+
+        if len(order) != len(reachable):
+            raise ValueError("Recipes contain a cycle")
+
+        return order
+
+    def ore_for_fuel(self, fuel):
+        """Ore needed to produce `fuel` of the product.
+
+        By the time a chemical is reached in order the total needed of it
+        is known, so it can be made in one go with as few batches as cover
+        that total.
+        """
+        needed = [0] * len(self.names)
+        needed[self.product] = fuel
+        for i in self.order:
+            batches = -(-needed[i] // self.per_batch[i])
+            for k in self.recipe(i):
+                needed[self.ingredients[k]] += self.amounts[k] * batches
+
+        return needed[0]
+
+    def max_fuel(self, ore):
+        """Most of the product that can be produced from `ore` ore."""
+        # Double until out of reach, then bisect between the last two
+        low, high = 0, 1
+        while self.ore_for_fuel(high) <= ore:
+            low, high = high, high * 2
+
+        while high - low > 1:
+            mid = (low + high) // 2
+            if self.ore_for_fuel(mid) <= ore:
+                low = mid
+            else:
+                high = mid
+
+        return low
 
 
 def main(argv):
@@ -35,17 +109,9 @@ def main(argv):
                 [(int(amount), ingredient) for amount, ingredient in terms[:-1]],
             )
 
-    print(recipes)
-    stock = defaultdict(int)
-    produce(1, "FUEL", recipes, stock)
-    print(-stock["ORE"])
-
-    for i in range(2125000, 2250000):
-        stock = defaultdict(int)
-        produce(i, "FUEL", recipes, stock)
-        if -stock["ORE"] > 1000000000000:
-            print(i - 1)
-            break
+    reactions = Reactions(recipes)
+    print(reactions.ore_for_fuel(1))
+    print(reactions.max_fuel(1000000000000))
 
 
 if __name__ == "__main__":
@@ -2,6 +2,15 @@
 import operator
 import sys
 
+from collections import defaultdict
+from itertools import product
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from intcode.sweep import search  # noqa: E402
+from parsecache import load_ints  # noqa: E402
+
 TARGET = 19690720
 
 
@@ -27,25 +36,160 @@ def intcode(mem):
     return mem[0]
 
 
+class Poly:
+    """Polynomial in the noun and verb.
+
+    Terms map the exponents (i, j) to the coefficient of noun**i * verb**j.
+    Arithmetic with ints and other polynomials returns a plain int whenever
+    the result no longer depends on noun or verb.
+    """
+
+    def __init__(self, terms):
+        self.terms = terms
+
+    @staticmethod
+    def make(terms):
+        terms = {k: c for k, c in terms.items() if c}
+        if not terms.keys() - {(0, 0)}:
+            return terms.get((0, 0), 0)
+
+        return Poly(terms)
+
+    @staticmethod
+    def terms_of(x):
+        return x.terms if isinstance(x, Poly) else {(0, 0): x}
+
+    def __add__(self, other):
+        terms = defaultdict(int, self.terms)
+        for k, c in Poly.terms_of(other).items():
+            terms[k] += c
+        return Poly.make(terms)
+
+    __radd__ = __add__
+
+    def __mul__(self, other):
+        terms = defaultdict(int)
+        for (i0, j0), c0 in self.terms.items():
+            for (i1, j1), c1 in Poly.terms_of(other).items():
+                terms[i0 + i1, j0 + j1] += c0 * c1
+        return Poly.make(terms)
+
+    __rmul__ = __mul__
+
+    def __repr__(self):
+        return " + ".join(
+            f"{c}*n^{i}*v^{j}" for (i, j), c in sorted(self.terms.items())
+        )
+
+
+NOUN = Poly({(1, 0): 1})
+VERB = Poly({(0, 1): 1})
+
+# A value that depends on noun or verb in a way that isn't tracked, such as
+# a load through a symbolic address
+UNKNOWN = object()
+
+
+def symbolic_intcode(mem):
+    """Run the program once with noun and verb left as unknowns.
+
+    Returns mem[0] as a Poly in noun and verb, or an int if it doesn't depend
+    on them. Returns None if a symbolic value is used as an opcode or a store
+    address, or if mem[0] can't be tracked, in which case the program has to
+    be run concretely.
+    """
+    mem = mem.copy()
+    mem[1] = NOUN
+    mem[2] = VERB
+
+    def load(addr):
+        return mem[addr] if isinstance(addr, int) else UNKNOWN
+
+    ops = {1: operator.add, 2: operator.mul}
+
+    pc = 0
+    while True:
+        opcode = mem[pc]
+        if opcode == 99:
+            break
+
+        if not isinstance(opcode, int) or opcode not in ops:
+            return None
+
+        dst = mem[pc + 3]
+        if not isinstance(dst, int):
+            return None
+
+        a = load(mem[pc + 1])
+        b = load(mem[pc + 2])
+        if a is UNKNOWN or b is UNKNOWN:
+            mem[dst] = UNKNOWN
+        else:
+            mem[dst] = ops[opcode](a, b)
+
+        pc += 4
+
+    return None if mem[0] is UNKNOWN else mem[0]
+
+
+def solve(poly, target):
+    """Find the first noun and verb, in search order, where poly == target."""
+    for noun in range(100):
+        # Substitute the noun, leaving coefficients by power of verb
+        coeffs = defaultdict(int)
+        for (i, j), c in Poly.terms_of(poly).items():
+            coeffs[j] += c * noun ** i
+        coeffs[0] -= target
+
+        degree = max((j for j, c in coeffs.items() if c), default=0)
+        if degree == 0:
+            if not coeffs[0]:
+                return noun, 0
+        elif degree == 1:
+            verb, r = divmod(-coeffs[0], coeffs[1])
+            if not r and 0 <= verb < 100:
+                return noun, verb
+        else:
+            for verb in range(100):
+                if not sum(c * verb ** j for j, c in coeffs.items()):
+                    return noun, verb
+
+    return None
+
+
 def init_and_run(mem, noun, verb):
     mem[1] = noun
     mem[2] = verb
     return intcode(mem)
 
 
+def run_pair(mem, pair):
+    noun, verb = pair
+    return init_and_run(mem.copy(), noun, verb)
+
+
+def is_target(output):
+    return output == TARGET
+
+
 def main(argv):
-    with open(argv[1], "r") as f:
-        mem = [int(n) for n in f.read().split(",")]
+    mem = load_ints(argv[1], ",")
 
     print(init_and_run(mem.copy(), 12, 2))
 
-    for noun in range(100):
-        for verb in range(100):
-            if init_and_run(mem.copy(), noun, verb) == TARGET:
-                print(100 * noun + verb)
-                return
+    poly = symbolic_intcode(mem)
+    if poly is not None:
+        solution = solve(poly, TARGET)
+    else:
+        match = search(mem, product(range(100), repeat=2), is_target, evaluate=run_pair)
+        solution = None if match is None else match[1]
+
+    if solution is None:
+        print("No solutions found")
+        return
 
-    print("No solutions found")
+    noun, verb = solution
+    print(100 * noun + verb)
 
 
 if __name__ == "__main__":
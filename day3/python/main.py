@@ -1,44 +1,288 @@
 #!/usr/bin/env python3
 import sys
 
+from bisect import bisect_left, insort
+from collections import defaultdict, namedtuple
 
 DIRECTIONS = {"U": (0, 1), "D": (0, -1), "R": (1, 0), "L": (-1, 0)}
 
+# A straight run of a wire along `line`, the y of a horizontal segment or
+# the x of a vertical one. It covers the cells lo..hi along its axis, and
+# was `steps` steps along the wire at coordinate `start`, the cell it left
+# from.
+Segment = namedtuple("Segment", ["horizontal", "line", "lo", "hi", "start", "steps"])
+
+
+def point(segment, t):
+    return (t, segment.line) if segment.horizontal else (segment.line, t)
+
+
+def delay(segment, t):
+    """Steps along the wire to reach coordinate `t` of the segment."""
+    return segment.steps + abs(t - segment.start)
+
 
 class Wire:
     def __init__(self, steps):
-        self.inner = {}
-        pos = (0, 0)
+        self.segments = []
+        x, y = 0, 0
         num_steps = 0
 
         for s in steps:
-            direction = s[0]
+            dx, dy = DIRECTIONS[s[0]]
             distance = int(s[1:])
+            if distance == 0:
+                continue
+
+            if dy == 0:
+                end = x + dx * distance
+                lo, hi = (x + 1, end) if dx > 0 else (end, x - 1)
+                self.segments.append(Segment(True, y, lo, hi, x, num_steps))
+                x = end
+            else:
+                end = y + dy * distance
+                lo, hi = (y + 1, end) if dy > 0 else (end, y - 1)
+                self.segments.append(Segment(False, x, lo, hi, y, num_steps))
+                y = end
+
+            num_steps += distance
+
+
+def perpendicular_crossings(horizontal, vertical):
+    """Pairs of a horizontal and a vertical segment that cross.
+
+    Sweeps across x: horizontal segments are kept sorted by y while the
+    sweep is over them, and each vertical segment looks up the ones within
+    its range of y.
+    """
+    events = []
+    for h in horizontal:
+        events.append((h.lo, 0, h))
+        events.append((h.hi, 2, h))
+    for v in vertical:
+        events.append((v.line, 1, v))
+    events.sort(key=lambda e: (e[0], e[1]))
+
+    active = []
+    for _, kind, segment in events:
+        if kind == 0:
+            insort(active, (segment.line, id(segment), segment))
+        elif kind == 2:
+            active.pop(bisect_left(active, (segment.line, id(segment))))
+        else:
+            i = bisect_left(active, (segment.lo,))
+            while i < len(active) and active[i][0] <= segment.hi:
+                yield active[i][2], segment
+                i += 1
+
+
+def overlapping(a, b):
+    """Pairs of segments of `a` and `b` on the same line whose cells overlap."""
+    lines = defaultdict(list)
+    for which, segments in enumerate((a, b)):
+        for s in segments:
+            lines[s.line].append((s.lo, which, s))
+
+    for on_line in lines.values():
+        on_line.sort(key=lambda e: e[0])
+        active = ([], [])
+        for lo, which, s in on_line:
+            for side in active:
+                side[:] = [t for t in side if t.hi >= lo]
+
+            for other in active[1 - which]:
+                yield (s, other) if which == 0 else (other, s)
+
+            active[which].append(s)
+
+
+def crossing_candidates(a, b):
+    """Points where segments `a` and `b` cross that may be closest or soonest.
+
+    Along an overlap both distance and delay are convex, so their minimum
+    away from the origin is at an end or next to the origin.
+    """
+    if a.horizontal != b.horizontal:
+        h, v = (a, b) if a.horizontal else (b, a)
+        yield (v.line, h.line), delay(h, v.line) + delay(v, h.line)
+        return
+
+    lo, hi = max(a.lo, b.lo), min(a.hi, b.hi)
+    for t in {lo, hi, *(min(max(c, lo), hi) for c in (-1, 0, 1))}:
+        yield point(a, t), delay(a, t) + delay(b, t)
+
+
+def nearest(pairs):
+    """Smallest distance and delay of the crossings of crossing segments.
+
+    Returns None if there are none apart from the origin, which doesn't
+    count.
+    """
+    min_distance = min_delay = None
+    for s, t in pairs:
+        for (x, y), steps in crossing_candidates(s, t):
+            if (x, y) == (0, 0):
+                continue
+
+            distance = abs(x) + abs(y)
+            if min_distance is None or distance < min_distance:
+                min_distance = distance
+            if min_delay is None or steps < min_delay:
+                min_delay = steps
 
-            for _ in range(distance):
-                num_steps += 1
-                pos = tuple(map(sum, zip(pos, DIRECTIONS[direction])))
-                if pos not in self.inner:
-                    self.inner[pos] = num_steps
+    if min_distance is None:
+        return None
 
-    def points(self):
-        return set(self.inner.keys())
+    return min_distance, min_delay
 
-    def num_steps(self, point):
-        return self.inner[point]
+
+def closest_crossings(a, b):
+    """Closest crossing of wires `a` and `b`, by distance and by delay.
+
+    Returns the Manhattan distance of the closest crossing and the smallest
+    combined delay of any crossing, or None if the wires don't cross. Work
+    depends on the number of segments and crossings, not on the length of
+    the wires.
+    """
+    pairs = []
+    for first, second in ((a, b), (b, a)):
+        horizontal = [s for s in first.segments if s.horizontal]
+        vertical = [s for s in second.segments if not s.horizontal]
+        pairs.extend(perpendicular_crossings(horizontal, vertical))
+
+    for horizontal in (True, False):
+        pairs.extend(
+            overlapping(
+                [s for s in a.segments if s.horizontal == horizontal],
+                [s for s in b.segments if s.horizontal == horizontal],
+            )
+        )
+
+    return nearest(pairs)
+
+
+class SegmentTree:
+    """Segments of one orientation, indexed by the cells they cover.
+
+    Coordinates along the segments' axis are compressed into slots, one for
+    each segment end and one for each gap between two ends, and every
+    segment is stored in the O(log n) tree nodes that exactly cover its
+    slots. Each node keeps its segments sorted by line, so the segments
+    covering a coordinate within a range of lines are found by looking
+    through the nodes above one leaf.
+    """
+
+    def __init__(self, segments):
+        self.coords = sorted({c for s in segments for c in (s.lo, s.hi)})
+        self.size = 1 << (2 * len(self.coords)).bit_length()
+
+        # Segments are added in order of line, which keeps every node sorted
+        self.nodes = {}
+        for s in sorted(segments, key=lambda s: s.line):
+            lo = self.size + 2 * bisect_left(self.coords, s.lo)
+            hi = self.size + 2 * bisect_left(self.coords, s.hi) + 1
+            while lo < hi:
+                if lo & 1:
+                    self._add(lo, s)
+                    lo += 1
+                if hi & 1:
+                    hi -= 1
+                    self._add(hi, s)
+                lo >>= 1
+                hi >>= 1
+
+        # Segments by line, sorted by their first cell, for overlaps
+        starts = defaultdict(list)
+        for s in sorted(segments, key=lambda s: s.lo):
+            starts[s.line].append(s)
+        self.starts = {
+            line: ([s.lo for s in on_line], on_line) for line, on_line in starts.items()
+        }
+
+    def _add(self, i, segment):
+        node = self.nodes.get(i)
+        if node is None:
+            node = self.nodes[i] = ([], [])
+
+        node[0].append(segment.line)
+        node[1].append(segment)
+
+    def _slot(self, t):
+        i = bisect_left(self.coords, t)
+        if i < len(self.coords) and self.coords[i] == t:
+            return 2 * i
+        elif 0 < i < len(self.coords):
+            return 2 * i - 1
+        else:
+            return None
+
+    def covering(self, t, lo, hi):
+        """Segments covering coordinate `t` on lines `lo` to `hi`."""
+        slot = self._slot(t)
+        if slot is None:
+            return
+
+        i = self.size + slot
+        while i:
+            node = self.nodes.get(i)
+            if node is not None:
+                lines, segments = node
+                j = bisect_left(lines, lo)
+                while j < len(lines) and lines[j] <= hi:
+                    yield segments[j]
+                    j += 1
+            i >>= 1
+
+    def overlapping(self, segment):
+        """Segments on the same line as `segment` sharing a cell with it."""
+        # Those covering its first cell, and those starting further along it
+        yield from self.covering(segment.lo, segment.line, segment.line)
+
+        on_line = self.starts.get(segment.line)
+        if on_line is not None:
+            los, segments = on_line
+            j = bisect_left(los, segment.lo + 1)
+            while j < len(segments) and los[j] <= segment.hi:
+                yield segments[j]
+                j += 1
+
+
+class WireIndex:
+    """Stored wires, indexed to check new wires against all of them.
+
+    Building the index takes O(n log n) for n stored segments, and finding
+    the crossings of a new wire takes O(log^2 n) per segment, plus the
+    crossings found.
+    """
+
+    def __init__(self, wires):
+        segments = [s for wire in wires for s in wire.segments]
+        self.horizontal = SegmentTree([s for s in segments if s.horizontal])
+        self.vertical = SegmentTree([s for s in segments if not s.horizontal])
+
+    def crossing_pairs(self, wire):
+        for s in wire.segments:
+            same, other = (
+                (self.horizontal, self.vertical)
+                if s.horizontal
+                else (self.vertical, self.horizontal)
+            )
+            for t in other.covering(s.line, s.lo, s.hi):
+                yield s, t
+            for t in same.overlapping(s):
+                yield s, t
+
+    def closest_crossings(self, wire):
+        """Like closest_crossings(), against every stored wire at once."""
+        return nearest(self.crossing_pairs(wire))
 
 
 def main(argv):
     with open(argv[1], "r") as f:
-        wires = [Wire(line.split(",")) for line in f]
+        wires = [Wire(line.strip().split(",")) for line in f]
 
-    intersections = set.intersection(*[w.points() for w in wires])
-    min_distance = min(abs(x) + abs(y) for (x, y) in intersections)
+    min_distance, min_signal_delay = closest_crossings(*wires)
     print(min_distance)
-
-    min_signal_delay = min(
-        sum(w.num_steps(pos) for w in wires) for pos in intersections
-    )
     print(min_signal_delay)
 
 
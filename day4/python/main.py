@@ -1,45 +1,112 @@
 #!/usr/bin/env python3
 import sys
 
+from functools import lru_cache
 
-def is_valid(x, low, high, part1):
-    digits = [int(c) for c in str(x)]
 
-    if len(digits) != 6:
-        return False
+def extend(state, digit, part1):
+    """State of a password after appending `digit`.
 
-    if x < low or x > high:
-        return False
+    A state is the last digit, the length of the run it ends (capped at 3,
+    as longer runs count the same) and whether the password already has a
+    run satisfying the rules. The empty password is (0, 0, False).
+    """
+    last, run, ok = state
+    if digit == last:
+        return last, min(run + 1, 3), ok
 
-    if not any(digits[i] == digits[i - 1] for i in range(1, 6)):
-        return False
+    return digit, 1, ok or finished(run, part1)
 
-    if any(digits[i] < digits[i - 1] for i in range(1, 6)):
-        return False
 
-    if not part1:
-        runs = []
-        for d in digits:
-            if not runs or d != runs[-1][0]:
-                runs.append((d, 1))
-            else:
-                runs[-1] = (d, runs[-1][1] + 1)
+def finished(run, part1):
+    # Part 1 takes any run of two or more, part 2 only a run of exactly two
+    return run >= 2 if part1 else run == 2
 
-        if not any(r[1] == 2 for r in runs):
-            return False
 
-    return True
+@lru_cache(maxsize=None)
+def completions(length, state, part1):
+    """Number of ways to append `length` digits to a password in `state`."""
+    last, run, ok = state
+    if length == 0:
+        return 1 if ok or finished(run, part1) else 0
+
+    # Digits never decrease and the first isn't zero, so none of them are
+    return sum(
+        completions(length - 1, extend(state, d, part1), part1)
+        for d in range(max(last, 1), 10)
+    )
+
+
+def count_up_to(n, part1):
+    """Number of valid passwords from 1 to `n`, of any length."""
+    if n < 1:
+        return 0
+
+    digits = [int(c) for c in str(n)]
+    empty = (0, 0, False)
+
+    # Every password shorter than n
+    count = sum(completions(length, empty, part1) for length in range(1, len(digits)))
+
+    # Passwords of the same length, sharing a prefix with n and then going
+    # below it
+    state = empty
+    for i, top in enumerate(digits):
+        for d in range(max(state[0], 1), top):
+            count += completions(len(digits) - i - 1, extend(state, d, part1), part1)
+
+        if top < max(state[0], 1):
+            return count
+
+        state = extend(state, top, part1)
+
+    # n itself
+    return count + completions(0, state, part1)
+
+
+def count_valid(low, high, part1):
+    """Number of valid passwords from `low` to `high`, in O(digits) steps."""
+    return count_up_to(high, part1) - count_up_to(low - 1, part1)
+
+
+def valid_passwords(low, high, part1):
+    """Yield the valid passwords from `low` to `high` in increasing order.
+
+    Passwords are built digit by digit, skipping every prefix that has no
+    valid completion or whose completions all fall outside the range.
+    """
+
+    def search(prefix, state, length):
+        if length == 0:
+            if completions(0, state, part1):
+                yield prefix
+            return
+
+        for d in range(max(state[0], 1), 10):
+            next_state = extend(state, d, part1)
+            if not completions(length - 1, next_state, part1):
+                continue
+
+            # The smallest completion repeats d and the largest is all nines
+            smallest = int(str(prefix * 10 + d) + str(d) * (length - 1))
+            largest = int(str(prefix * 10 + d) + "9" * (length - 1))
+            if largest < low:
+                continue
+            if smallest > high:
+                return
+
+            yield from search(prefix * 10 + d, next_state, length - 1)
+
+    for length in range(len(str(max(low, 1))), len(str(high)) + 1):
+        yield from search(0, (0, 0, False), length)
 
 
 def main(argv):
     with open(argv[1], "r") as f:
         low, high = (int(x) for x in f.read().split("-"))
 
-    candidates = [x for x in range(low, high + 1) if is_valid(x, low, high, True)]
-    print(len(candidates))
-
-    candidates = [x for x in range(low, high + 1) if is_valid(x, low, high, False)]
-    print(len(candidates))
+    print(count_valid(low, high, True))
+    print(count_valid(low, high, False))
 
 
 if __name__ == "__main__":
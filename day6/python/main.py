@@ -1,47 +1,90 @@
 #!/usr/bin/env python3
 import sys
 
+# Depths of objects still being worked out
+VISITING = -2
 
-def path_to_com(orbits, source):
-    ret = []
-    cur = source
-    while cur != "COM":
-        ret.append(cur)
-        cur = orbits[cur]
-    return ret
 
+class OrbitMap:
+    """Objects numbered from COM at 0, each with the object it orbits.
 
-def num_transfers(orbits, source, dest):
-    # Ignore YOU and SAN
-    source_to_com = path_to_com(orbits, source)[1:]
-    dest_to_com = path_to_com(orbits, dest)[1:]
+    `parent[i]` is the object that object i orbits, or -1 for COM and for
+    any object that was only seen being orbited.
+    """
 
-    prefix_len = 0
-    for a, b in zip(reversed(source_to_com), reversed(dest_to_com)):
-        if a == b:
-            prefix_len += 1
+    def __init__(self, orbits):
+        self.ids = {"COM": 0}
+        self.parent = [-1]
+        for parent, child in orbits:
+            self.parent[self.id(child)] = self.id(parent)
 
-    # Strip common suffix, add one for rendezvous point, subtract one to get
-    # number of transfers rather than number of stops
-    return len(source_to_com) + len(dest_to_com) - 2 * prefix_len
+        self.depth = self._depths()
+
+    def id(self, name):
+        i = self.ids.get(name)
+        if i is None:
+            i = self.ids[name] = len(self.parent)
+            self.parent.append(-1)
+
+        return i
+
+    def _depths(self):
+        # Climb from each object until an object of known depth, then fill
+        # in the depths on the way back down, so each is only set once
+        parent = self.parent
+        depth = [-1] * len(parent)
+        depth[0] = 0
+        for i in range(len(parent)):
+            if depth[i] >= 0:
+                continue
+
+            path = []
+            while depth[i] < 0:
+                if depth[i] == VISITING:
+                    raise ValueError("Orbits contain a cycle")
+                if parent[i] < 0:
+                    raise ValueError("Object does not orbit COM")
+
+                depth[i] = VISITING
+                path.append(i)
+                i = parent[i]
+
+            d = depth[i]
+            for j in reversed(path):
+                d += 1
+                depth[j] = d
+
+        return depth
+
+    def total_orbits(self):
+        """Number of direct and indirect orbits, the sum of all depths."""
+        return sum(self.depth)
+
+    def num_transfers(self, source, dest):
+        """Orbital transfers between the objects `source` and `dest` orbit."""
+        a = self.parent[self.ids[source]]
+        b = self.parent[self.ids[dest]]
+        transfers = 0
+        while self.depth[a] > self.depth[b]:
+            a = self.parent[a]
+            transfers += 1
+        while self.depth[b] > self.depth[a]:
+            b = self.parent[b]
+            transfers += 1
+        while a != b:
+            a = self.parent[a]
+            b = self.parent[b]
+            transfers += 2
+
+        return transfers
 
 
 def main(argv):
-    orbits = {}
     with open(argv[1], "r") as f:
-        for line in f:
-            parent, child = line.strip().split(")")
-            orbits[child] = parent
-
-    count = 0
-    for obj in orbits.keys():
-        cur = obj
-        while cur != "COM":
-            count += 1
-            cur = orbits[cur]
-
-    print(count)
-    print(num_transfers(orbits, "YOU", "SAN"))
+        orbit_map = OrbitMap(line.strip().split(")") for line in f)
+
+    print(orbit_map.total_orbits())
+    print(orbit_map.num_transfers("YOU", "SAN"))
 
 
 if __name__ == "__main__":
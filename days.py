@@ -0,0 +1,115 @@
+import importlib.util
+import io
+import resource
+import signal
+import sys
+import time
+import traceback
+
+from collections import namedtuple
+from contextlib import redirect_stdout
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+
+# Outcome of running a day: what it printed, its wall time, the peak
+# resident memory of the process in kB, and the error it failed with if any
+Result = namedtuple("Result", ["day", "output", "time", "peak_rss", "error"])
+
+
+def find_days():
+    """Numbers of the days with a Python solution, in order."""
+    return sorted(
+        int(path.parts[-3][3:]) for path in ROOT.glob("day*/python/main.py")
+    )
+
+
+def load_day(n):
+    """Import the Python solution of day `n` as a module."""
+    path = ROOT / f"day{n}" / "python" / "main.py"
+    spec = importlib.util.spec_from_file_location(f"day{n}", path)
+    module = importlib.util.module_from_spec(spec)
+    # Registered so that functions from it can be sent to worker processes
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def input_path(n):
+    return ROOT / f"day{n}" / "input"
+
+
+def answers(n):
+    """Expected output lines of day `n`, empty if they aren't known."""
+    path = ROOT / f"day{n}" / "answers"
+    if not path.exists():
+        return []
+
+    with open(path, "r") as f:
+        return f.read().splitlines()
+
+
+def check(n, output):
+    """Whether `output` starts with the answers of day `n`, or None if unknown."""
+    expected = answers(n)
+    if not expected:
+        return None
+
+    return output.splitlines()[: len(expected)] == expected
+
+
+def run_day(module, n, out=None):
+    """Run a day's main() on its input, returning what it printed."""
+    if out is None:
+        out = io.StringIO()
+
+    with redirect_stdout(out):
+        try:
+            module.main([module.__file__, str(input_path(n))])
+        except SystemExit as e:
+            # Some days exit explicitly when they are done
+            if e.code not in (None, 0):
+                raise
+
+    return out.getvalue()
+
+
+def peak_rss():
+    """Peak resident memory of this process so far, in kB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _timed_out(signum, frame):
+    raise TimeoutError
+
+
+def measure_day(n, timeout=None):
+    """Load and run day `n`, returning a Result rather than raising.
+
+    A day still running after `timeout` seconds is interrupted with
+    SIGALRM, so this must be called from the main thread of a process. A
+    day blocked waiting on a process pool of its own can't be stopped this
+    way, as the pool still waits for its workers to finish; run the day in
+    a child process and kill it to enforce a timeout on those.
+    """
+    out = io.StringIO()
+    error = None
+    if timeout:
+        handler = signal.signal(signal.SIGALRM, _timed_out)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    start = time.perf_counter()
+    try:
+        run_day(load_day(n), n, out)
+    except TimeoutError:
+        error = f"timed out after {timeout}s"
+    except (Exception, SystemExit):
+        error = traceback.format_exc()
+    finally:
+        elapsed = time.perf_counter() - start
+        if timeout:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, handler)
+
+    return Result(n, out.getvalue(), elapsed, peak_rss(), error)
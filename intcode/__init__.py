@@ -0,0 +1,6 @@
+from .backends import BACKENDS, Status, get_backend, register_backend
+from .compiler import Compiler
+from .interpreter import CachedInterpreter, Instruction, Interpreter
+from .machine import Intcode, Snapshot
+from .memory import PAGE_SIZE, PagedMemory, count_pages
+from .profiler import Profile, ProfilingInterpreter
@@ -0,0 +1,41 @@
+import asyncio
+
+from .backends import Status
+
+
+async def drive(m, inq, outq):
+    """Run a machine as a coroutine wired to asyncio queues.
+
+    Input the machine was constructed or sent with is used first; after that
+    it waits on `inq`, and every output is put on `outq`. Only one machine
+    runs at a time, so any number of them can share an event loop, each
+    suspending whenever it blocks on input.
+    """
+    while True:
+        status = m.resume()
+        if status is Status.HALTED:
+            return m
+        elif status is Status.OUTPUT:
+            await outq.put(m.recv())
+        else:
+            m.send(await inq.get())
+
+
+async def run_ring(machines, *initial):
+    """Run machines connected in a loop, each feeding its successor.
+
+    The `initial` values are sent to the first machine ahead of anything
+    the last one produces. Returns the machines once all have halted.
+    """
+    qs = [asyncio.Queue() for _ in machines]
+    for v in initial:
+        qs[0].put_nowait(v)
+
+    await asyncio.gather(
+        *(
+            drive(m, qs[i], qs[(i + 1) % len(machines)])
+            for i, m in enumerate(machines)
+        )
+    )
+
+    return machines
@@ -0,0 +1,47 @@
+import enum
+import os
+
+DEFAULT_BACKEND = "cached"
+BACKEND_ENV_VAR = "INTCODE_BACKEND"
+
+BACKENDS = {}
+
+
+class Status(enum.Enum):
+    """Why a machine stopped running."""
+
+    INPUT = "input"
+    OUTPUT = "output"
+    HALTED = "halted"
+
+
+def register_backend(name):
+    """Class decorator adding an execution backend to the registry.
+
+    A backend is constructed with the machine it drives and must provide
+    `step()`, executing a single instruction, `run()`, executing until the
+    machine waits for input, produces an output or halts, and
+    `invalidate(addr)`, called whenever memory at `addr` is overwritten,
+    and `fork(m)`, creating a backend for a copy of its machine.
+    Both `step()` and `run()` record why they stopped in the machine's
+    `status` and return it; `step()` leaves it None if nothing happened.
+    """
+
+    def register(cls):
+        BACKENDS[name] = cls
+        return cls
+
+    return register
+
+
+def get_backend(name=None):
+    """Look up a backend by name, defaulting to $INTCODE_BACKEND."""
+    if name is None:
+        name = os.environ.get(BACKEND_ENV_VAR, DEFAULT_BACKEND)
+
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown Intcode backend {name!r}, expected one of {sorted(BACKENDS)}"
+        ) from None
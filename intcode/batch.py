@@ -0,0 +1,145 @@
+import numpy as np
+
+# Machine states
+RUNNING, HALTED, INPUT, FAULT = range(4)
+
+
+class Batch:
+    """Many copies of one Intcode program run in lockstep on NumPy arrays.
+
+    Memories are the rows of a 2-D array of `size` words, initialised from
+    `program` and free to be patched through `mem` before running. Each step
+    decodes the instruction of every running machine at once and executes
+    every opcode as one vectorised operation over the machines that have it,
+    so interpreter overhead is paid per step rather than per machine.
+
+    Inputs come from the rows of `inputs`. A machine that reads past them
+    stops in the INPUT state, and one that halts in the HALTED state. A
+    machine that touches an address outside its memory or hits an invalid
+    opcode or mode stops in the FAULT state. Words are 64-bit and wrap on
+    overflow rather than growing like Python ints.
+    """
+
+    def __init__(self, program, n, inputs=None, size=None):
+        program = np.asarray(program, dtype=np.int64)
+        if size is None:
+            size = len(program)
+
+        self.n = n
+        self.size = size
+        self.mem = np.zeros((n, size), dtype=np.int64)
+        self.mem[:, : len(program)] = program
+        self.pc = np.zeros(n, dtype=np.int64)
+        self.rel_base = np.zeros(n, dtype=np.int64)
+        self.state = np.full(n, RUNNING, dtype=np.int8)
+
+        if inputs is None:
+            inputs = np.zeros((n, 0), dtype=np.int64)
+        self.inputs = np.asarray(inputs, dtype=np.int64).reshape(n, -1)
+        self.in_pos = np.zeros(n, dtype=np.int64)
+
+        self.outputs = np.zeros((n, 4), dtype=np.int64)
+        self.out_pos = np.zeros(n, dtype=np.int64)
+
+    def output(self, i):
+        """Outputs produced so far by machine `i`."""
+        return self.outputs[i, : self.out_pos[i]].tolist()
+
+    def last_outputs(self):
+        """Most recent output of every machine, or 0 where there is none."""
+        last = self.outputs[np.arange(self.n), np.maximum(self.out_pos - 1, 0)]
+        return np.where(self.out_pos > 0, last, 0)
+
+    def _fault(self, rows, bad):
+        self.state[rows[bad]] = FAULT
+        return ~bad
+
+    def _addr(self, rows, pc, k, mode):
+        """Addresses of parameter `k` for machines `rows`, or -1 if invalid."""
+        raw = self.mem[rows, np.minimum(pc + k, self.size - 1)]
+        addr = np.where(mode == 1, pc + k, raw)
+        addr = np.where(mode == 2, self.rel_base[rows] + raw, addr)
+        bad = (addr < 0) | (addr >= self.size) | (mode > 2) | (pc + k >= self.size)
+        return np.where(bad, -1, addr)
+
+    def step(self):
+        """Execute one instruction on every running machine."""
+        rows = np.flatnonzero(self.state == RUNNING)
+        if not len(rows):
+            return False
+
+        pc = self.pc[rows]
+        # A jump may have left the pc outside memory, where nothing decodes
+        ok = self._fault(rows, (pc < 0) | (pc >= self.size))
+        rows, pc = rows[ok], pc[ok]
+        ins = self.mem[rows, pc]
+        opcode = ins % 100
+        modes = [ins // 100 % 10, ins // 1000 % 10, ins // 10000 % 10]
+
+        for op in np.unique(opcode):
+            sel = opcode == op
+            r, p = rows[sel], pc[sel]
+            m = [mode[sel] for mode in modes]
+
+            if op in (1, 2, 7, 8):
+                a, b, dst = (self._addr(r, p, k + 1, m[k]) for k in range(3))
+                ok = self._fault(r, (a < 0) | (b < 0) | (dst < 0) | (m[2] == 1))
+                r, p, a, b, dst = r[ok], p[ok], a[ok], b[ok], dst[ok]
+                x, y = self.mem[r, a], self.mem[r, b]
+                if op == 1:
+                    value = x + y
+                elif op == 2:
+                    value = x * y
+                elif op == 7:
+                    value = (x < y).astype(np.int64)
+                else:
+                    value = (x == y).astype(np.int64)
+                self.mem[r, dst] = value
+                self.pc[r] = p + 4
+            elif op in (5, 6):
+                a, b = (self._addr(r, p, k + 1, m[k]) for k in range(2))
+                ok = self._fault(r, (a < 0) | (b < 0))
+                r, p, a, b = r[ok], p[ok], a[ok], b[ok]
+                cond = self.mem[r, a] != 0
+                if op == 6:
+                    cond = ~cond
+                self.pc[r] = np.where(cond, self.mem[r, b], p + 3)
+            elif op == 3:
+                dst = self._addr(r, p, 1, m[0])
+                ok = self._fault(r, (dst < 0) | (m[0] == 1))
+                r, p, dst = r[ok], p[ok], dst[ok]
+                waiting = self.in_pos[r] >= self.inputs.shape[1]
+                self.state[r[waiting]] = INPUT
+                r, p, dst = r[~waiting], p[~waiting], dst[~waiting]
+                self.mem[r, dst] = self.inputs[r, self.in_pos[r]]
+                self.in_pos[r] += 1
+                self.pc[r] = p + 2
+            elif op == 4:
+                a = self._addr(r, p, 1, m[0])
+                ok = self._fault(r, a < 0)
+                r, p, a = r[ok], p[ok], a[ok]
+                width = self.outputs.shape[1]
+                if len(r) and self.out_pos[r].max() >= width:
+                    self.outputs = np.pad(self.outputs, ((0, 0), (0, width)))
+                self.outputs[r, self.out_pos[r]] = self.mem[r, a]
+                self.out_pos[r] += 1
+                self.pc[r] = p + 2
+            elif op == 9:
+                a = self._addr(r, p, 1, m[0])
+                ok = self._fault(r, a < 0)
+                r, p, a = r[ok], p[ok], a[ok]
+                self.rel_base[r] += self.mem[r, a]
+                self.pc[r] = p + 2
+            elif op == 99:
+                self.state[r] = HALTED
+            else:
+                self.state[r] = FAULT
+
+        return True
+
+    def run(self):
+        """Step until no machine is running any more."""
+        while self.step():
+            pass
+
+        return self
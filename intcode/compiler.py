@@ -0,0 +1,277 @@
+from functools import lru_cache
+from operator import itemgetter
+from types import CodeType, FunctionType
+
+from .backends import Status, register_backend
+from .interpreter import Instruction, Interpreter
+from .memory import PAGE_BITS, PAGE_MASK
+
+# Number of parameters taken by each opcode
+ARITY = {1: 3, 2: 3, 3: 1, 4: 1, 5: 2, 6: 2, 7: 3, 8: 3, 9: 1, 99: 0}
+
+# Parameters each opcode stores to, which can't be in immediate mode
+STORES = {1: (2,), 2: (2,), 3: (0,), 7: (2,), 8: (2,)}
+
+
+def compilable(word):
+    """Whether `word` decodes to an instruction with valid parameter modes."""
+    try:
+        ins = Instruction(word)
+    except KeyError:
+        return False
+
+    stores = STORES.get(ins.opcode, ())
+    return all(
+        ins.modes[i] in ((0, 2) if i in stores else (0, 1, 2))
+        for i in range(ARITY[ins.opcode])
+    )
+
+
+def _offset(base, n):
+    if isinstance(n, str):
+        return f"{base} + {n}"
+    elif n > 0:
+        return f"{base} + {n}"
+    elif n < 0:
+        return f"{base} - {-n}"
+    else:
+        return base
+
+
+class BlockBuilder:
+    """Generate the Python source for one basic block.
+
+    A block starts at `start` and runs straight through the program until
+    an instruction that may transfer control or hand it back to the caller
+    (a jump, an output or a halt). Parameter values are read from memory
+    when the block is compiled, except for the words in `volatile`, which
+    the program is known to patch at run time and so are read by the block
+    itself. The addresses whose values were baked into the block are
+    collected in `covered`.
+    """
+
+    def __init__(self, mem, start, volatile=()):
+        self.mem = mem
+        self.start = start
+        self.volatile = volatile
+        self.covered = []
+        self.lines = []
+
+    def emit(self, line):
+        self.lines.append("    " + line)
+
+    def word(self, addr):
+        if 0 <= addr >> PAGE_BITS < len(self.mem.dense):
+            # The dense region never shrinks, so read straight from the page
+            return f"dense[{addr >> PAGE_BITS}][{addr & PAGE_MASK}]"
+        else:
+            return f"mem[{addr}]"
+
+    def param(self, addr):
+        if addr in self.volatile:
+            return self.word(addr)
+
+        self.covered.append(addr)
+        return self.mem[addr]
+
+    def load(self, mode, p):
+        if mode == 0 and isinstance(p, str):
+            return f"mem[{p}]"
+        elif mode == 0:
+            return self.word(p)
+        elif mode == 1:
+            return str(p)
+        elif mode == 2:
+            return f"mem[{_offset('rb', p)}]"
+        else:
+            raise Exception("Invalid parameter mode")
+
+    def store(self, mode, p, value, next_pc):
+        if mode == 0 and isinstance(p, str):
+            self.emit(f"a = {p}")
+            addr = "a"
+        elif mode == 0:
+            addr = str(p)
+        elif mode == 2:
+            self.emit(f"a = {_offset('rb', p)}")
+            addr = "a"
+        else:
+            raise Exception("Invalid parameter mode")
+
+        self.emit(f"mem[{addr}] = {value}")
+        # The store may have overwritten code that is already compiled,
+        # possibly later in this very block, so leave before running it
+        self.emit(f"if {addr} in code:")
+        self.emit(f"    invalidate({addr})")
+        self.emit(f"    return {next_pc}, rb")
+
+    def build(self):
+        mem = self.mem
+        pc = self.start
+        while True:
+            ins = Instruction(mem[pc])
+            opcode, modes = ins.opcode, ins.modes
+            self.covered.append(pc)
+            params = [self.param(pc + i + 1) for i in range(ARITY[opcode])]
+            next_pc = pc + len(params) + 1
+
+            if opcode in (1, 2, 7, 8):
+                a = self.load(modes[0], params[0])
+                b = self.load(modes[1], params[1])
+                value = {
+                    1: f"{a} + {b}",
+                    2: f"{a} * {b}",
+                    7: f"1 if {a} < {b} else 0",
+                    8: f"1 if {a} == {b} else 0",
+                }[opcode]
+                self.store(modes[2], params[2], value, next_pc)
+            elif opcode == 3:
+                self.emit("if not inputs:")
+                self.emit("    m.status = INPUT")
+                self.emit(f"    return {pc}, rb")
+                self.store(modes[0], params[0], "inputs.popleft()", next_pc)
+            elif opcode == 4:
+                self.emit(f"v = {self.load(modes[0], params[0])}")
+                self.emit("outputs.append(v)")
+                self.emit("m.last_output = v")
+                self.emit("m.status = OUTPUT")
+                self.emit(f"return {next_pc}, rb")
+                break
+            elif opcode == 9:
+                self.emit(f"rb += {self.load(modes[0], params[0])}")
+            elif opcode in (5, 6):
+                cond = self.load(modes[0], params[0])
+                target = self.load(modes[1], params[1])
+                self.emit(f"if {'' if opcode == 5 else 'not '}{cond}:")
+                self.emit(f"    return {target}, rb")
+                self.emit(f"return {next_pc}, rb")
+                break
+            elif opcode == 99:
+                self.emit("m.status = HALTED")
+                self.emit(f"return {pc}, rb")
+                break
+
+            pc = next_pc
+
+            # Stop short of anything that would fail to decode or compile, so
+            # that the error is only raised if control actually gets there,
+            # and not at all if the program patches it first
+            if not compilable(mem[pc]):
+                self.emit(f"return {pc}, rb")
+                break
+
+        return "\n".join(
+            [
+                "def block(rb, mem, dense, m, inputs, outputs, code, invalidate):"
+            ]
+            + self.lines
+        )
+
+
+@lru_cache(maxsize=4096)
+def compile_block(source, pc):
+    # Every machine running a program compiles the same blocks, so share
+    # code objects between them
+    module = compile(source, f"<intcode block {pc}>", "exec")
+    return next(c for c in module.co_consts if isinstance(c, CodeType))
+
+
+BLOCK_GLOBALS = {
+    "INPUT": Status.INPUT,
+    "OUTPUT": Status.OUTPUT,
+    "HALTED": Status.HALTED,
+}
+
+
+@register_backend("compiled")
+class Compiler(Interpreter):
+    """Compile basic blocks of the program into Python functions.
+
+    Blocks are compiled on first entry and cached by start address. Every
+    code address baked into a block maps back to it, and a store to one of
+    those addresses throws the block away so it is recompiled from the new
+    code on its next entry. Operand words that get overwritten this way are
+    then treated as volatile, so programs that compute addresses by
+    patching their own operands don't recompile on every store.
+    """
+
+    def __init__(self, m):
+        super().__init__(m)
+        self.blocks = {}
+        self.code = {}
+        self.volatile = set()
+        # Baked addresses of each block with a getter for their values, and
+        # compiled blocks by start address and baked contents, both kept
+        # across invalidation
+        self.layouts = {}
+        self.templates = {}
+
+    def compile(self, pc):
+        mem = self.m.mem
+        template = None
+        layout = self.layouts.get(pc)
+        if layout is not None:
+            covered, words = layout
+            template = self.templates.get((pc, covered, words(mem)))
+
+        if template is None:
+            builder = BlockBuilder(mem, pc, self.volatile)
+            source = builder.build()
+            covered = tuple(builder.covered)
+            words = itemgetter(*covered)
+            self.layouts[pc] = (covered, words)
+            template = compile_block(source, pc)
+            self.templates[pc, covered, words(mem)] = template
+
+        m = self.m
+        block = FunctionType(
+            template,
+            BLOCK_GLOBALS,
+            "block",
+            (mem, mem.dense, m, m.inputs, m.outputs, self.code, self.invalidate),
+        )
+        self.blocks[pc] = block
+        for addr in covered:
+            self.code.setdefault(addr, []).append(pc)
+
+        return block
+
+    def fork(self, m):
+        # Compiled blocks are bound to their machine, but the templates they
+        # are made from can be shared
+        child = super().fork(m)
+        child.volatile = set(self.volatile)
+        child.layouts = dict(self.layouts)
+        child.templates = self.templates
+        return child
+
+    def invalidate(self, addr):
+        starts = self.code.get(addr)
+        if not starts:
+            return
+
+        self.volatile.add(addr)
+        for start in starts.copy():
+            del self.blocks[start]
+            for a in self.layouts[start][0]:
+                owners = self.code[a]
+                owners.remove(start)
+                if not owners:
+                    del self.code[a]
+
+    def run(self):
+        m = self.m
+        blocks = self.blocks
+        pc, rb = m.pc, m.rel_base
+        m.status = None
+        try:
+            while m.status is None:
+                block = blocks.get(pc)
+                if block is None:
+                    block = self.compile(pc)
+
+                pc, rb = block(rb)
+        finally:
+            m.pc, m.rel_base = pc, rb
+
+        return m.status
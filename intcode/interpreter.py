@@ -0,0 +1,186 @@
+import operator
+
+from .backends import Status, register_backend
+
+
+def less_than(a, b):
+    return 1 if a < b else 0
+
+
+def equals(a, b):
+    return 1 if a == b else 0
+
+
+class Instruction:
+    def __init__(self, opcode):
+        d = 10000
+        m3, opcode, d = opcode // d, opcode % d, d // 10
+        m2, opcode, d = opcode // d, opcode % d, d // 10
+        m1, opcode, d = opcode // d, opcode % d, d // 10
+
+        self.modes = [m1, m2, m3]
+        self.opcode = opcode
+        self.run = {
+            1: self.add,
+            2: self.mul,
+            3: self.read,
+            4: self.write,
+            5: self.jnz,
+            6: self.jz,
+            7: self.lt,
+            8: self.eq,
+            9: self.set_base,
+            99: self.halt,
+        }[opcode]
+
+    def load(self, m, arg):
+        mode = self.modes[arg]
+        addr = m.pc + arg + 1
+        if mode == 0:
+            return m.mem[m.mem[addr]]
+        elif mode == 1:
+            return m.mem[addr]
+        elif mode == 2:
+            return m.mem[m.rel_base + m.mem[addr]]
+        else:
+            raise Exception("Invalid parameter mode")
+
+    def store(self, m, arg, value):
+        mode = self.modes[arg]
+        addr = m.pc + arg + 1
+        if mode == 0:
+            addr = m.mem[addr]
+        elif mode == 2:
+            addr = m.rel_base + m.mem[addr]
+        else:
+            raise Exception("Invalid parameter mode")
+
+        m.mem[addr] = value
+        m.backend.invalidate(addr)
+
+    def _alu(self, m, f):
+        a = self.load(m, 0)
+        b = self.load(m, 1)
+        self.store(m, 2, f(a, b))
+        return 4
+
+    def add(self, m):
+        return self._alu(m, operator.add)
+
+    def mul(self, m):
+        return self._alu(m, operator.mul)
+
+    def lt(self, m):
+        return self._alu(m, less_than)
+
+    def eq(self, m):
+        return self._alu(m, equals)
+
+    def _jmp(self, m, f):
+        a = self.load(m, 0)
+        b = self.load(m, 1)
+        return b - m.pc if f(a) else 3
+
+    def jnz(self, m):
+        return self._jmp(m, operator.truth)
+
+    def jz(self, m):
+        return self._jmp(m, operator.not_)
+
+    def read(self, m):
+        if not m.inputs:
+            m.status = Status.INPUT
+            return 0
+
+        self.store(m, 0, m.inputs.popleft())
+        return 2
+
+    def write(self, m):
+        a = self.load(m, 0)
+        m.outputs.append(a)
+        m.last_output = a
+        m.status = Status.OUTPUT
+        return 2
+
+    def set_base(self, m):
+        a = self.load(m, 0)
+        m.rel_base += a
+        return 2
+
+    def halt(self, m):
+        m.status = Status.HALTED
+        return 0
+
+
+@register_backend("reference")
+class Interpreter:
+    """Decode and execute one instruction at a time."""
+
+    def __init__(self, m):
+        self.m = m
+
+    def decode(self, pc):
+        return Instruction(self.m.mem[pc])
+
+    def invalidate(self, addr):
+        pass
+
+    def fork(self, m):
+        return type(self)(m)
+
+    def step(self):
+        m = self.m
+        m.status = None
+        m.pc += self.decode(m.pc).run(m)
+        return m.status
+
+    def run(self):
+        m = self.m
+        m.status = None
+        while m.status is None:
+            m.pc += self.decode(m.pc).run(m)
+
+        return m.status
+
+
+@register_backend("cached")
+class CachedInterpreter(Interpreter):
+    """Interpreter keeping decoded instructions keyed by program address.
+
+    Stores that land on a cached address drop the entry, so self-modifying
+    programs are re-decoded on their next visit.
+    """
+
+    def __init__(self, m):
+        super().__init__(m)
+        self.decoded = {}
+
+    def decode(self, pc):
+        ins = self.decoded.get(pc)
+        if ins is None:
+            ins = Instruction(self.m.mem[pc])
+            self.decoded[pc] = ins
+
+        return ins
+
+    def invalidate(self, addr):
+        self.decoded.pop(addr, None)
+
+    def fork(self, m):
+        # Instructions don't hold on to their machine, so they can be shared
+        child = super().fork(m)
+        child.decoded = dict(self.decoded)
+        return child
+
+    def run(self):
+        m = self.m
+        decoded = self.decoded
+        m.status = None
+        while m.status is None:
+            ins = decoded.get(m.pc)
+            if ins is None:
+                ins = self.decode(m.pc)
+
+            m.pc += ins.run(m)
+
+        return m.status
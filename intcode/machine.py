@@ -0,0 +1,102 @@
+from collections import deque, namedtuple
+
+from .backends import Status, get_backend
+from .memory import PagedMemory
+
+Snapshot = namedtuple(
+    "Snapshot", ["mem", "pc", "rel_base", "inputs", "outputs", "status", "last_output"]
+)
+
+
+class Intcode:
+    """An Intcode virtual machine.
+
+    The machine runs in the calling thread and hands control back whenever
+    it needs input that has not been sent yet, produces an output, or
+    halts. Execution is delegated to a backend from the registry, selected
+    by name or through $INTCODE_BACKEND. Memory is paged, and `max_pages`
+    optionally bounds how much of it the program may allocate; `mem` is
+    either the program or a PagedMemory to run on as it is.
+    """
+
+    def __init__(self, mem, inputs=(), backend=None, max_pages=None):
+        if not isinstance(mem, PagedMemory):
+            mem = PagedMemory(mem, max_pages)
+
+        self.mem = mem
+        self.pc = 0
+        self.rel_base = 0
+        self.inputs = deque(inputs)
+        self.outputs = deque()
+        self.status = None
+        self.last_output = 0
+        self.backend_name = backend
+        self.backend = get_backend(backend)(self)
+
+    @property
+    def halted(self):
+        return self.status is Status.HALTED
+
+    def send(self, *values):
+        self.inputs.extend(values)
+
+    def recv(self):
+        return self.outputs.popleft()
+
+    def snapshot(self):
+        """Capture the machine's state.
+
+        Memory is shared copy-on-write with the machine, so taking a
+        snapshot costs time proportional to the number of pages, and it only
+        holds on to extra memory as the machine dirties them; count_pages()
+        measures that.
+        """
+        return Snapshot(
+            self.mem.fork(),
+            self.pc,
+            self.rel_base,
+            tuple(self.inputs),
+            tuple(self.outputs),
+            self.status,
+            self.last_output,
+        )
+
+    @classmethod
+    def restore(cls, snapshot, backend=None):
+        """Create a machine resuming from a snapshot, which stays reusable."""
+        m = cls(snapshot.mem.fork(), snapshot.inputs, backend)
+        m.pc = snapshot.pc
+        m.rel_base = snapshot.rel_base
+        m.outputs.extend(snapshot.outputs)
+        m.status = snapshot.status
+        m.last_output = snapshot.last_output
+        return m
+
+    def fork(self):
+        """Return an independent copy of the machine in its current state."""
+        child = self.restore(self.snapshot(), self.backend_name)
+        child.backend = self.backend.fork(child)
+        return child
+
+    def step(self):
+        """Execute a single instruction.
+
+        Returns the Status if the instruction waited for input, produced an
+        output or halted, and None otherwise.
+        """
+        return self.backend.step()
+
+    def resume(self):
+        """Execute until the machine needs input, produces an output or halts."""
+        return self.backend.run()
+
+    def run(self):
+        """Execute until the machine needs input or halts.
+
+        Outputs produced on the way are left in `outputs`.
+        """
+        status = self.backend.run()
+        while status is Status.OUTPUT:
+            status = self.backend.run()
+
+        return status
@@ -0,0 +1,105 @@
+PAGE_BITS = 10
+PAGE_SIZE = 1 << PAGE_BITS
+PAGE_MASK = PAGE_SIZE - 1
+
+
+class PagedMemory:
+    """Sparse Intcode memory made of fixed-size pages.
+
+    The program image, and any pages directly above it, are kept in a dense
+    list indexed by page number. Pages further out are created in a dict on
+    first write, and reading a word that was never written returns 0 without
+    allocating anything, so a stray access at a huge address costs nothing.
+    Negative addresses raise IndexError rather than wrapping around.
+
+    Memories can be forked, sharing their pages copy-on-write: numbers of
+    pages that may still be in use by another memory are kept in `shared`,
+    and such a page is copied on its first write.
+    """
+
+    def __init__(self, image=(), max_pages=None):
+        image = list(image)
+        image.extend([0] * (-len(image) % PAGE_SIZE))
+
+        self.dense = [image[i : i + PAGE_SIZE] for i in range(0, len(image), PAGE_SIZE)]
+        self.sparse = {}
+        self.shared = set()
+        self.max_pages = max_pages
+
+    def fork(self):
+        """Return a copy of this memory, in time proportional to its pages."""
+        child = PagedMemory(max_pages=self.max_pages)
+        child.dense = list(self.dense)
+        child.sparse = dict(self.sparse)
+
+        self.shared = set(range(len(self.dense)))
+        self.shared.update(self.sparse)
+        child.shared = set(self.shared)
+
+        return child
+
+    def pages(self):
+        yield from self.dense
+        yield from self.sparse.values()
+
+    def _unshare(self, n):
+        self.shared.discard(n)
+        if n < len(self.dense):
+            page = self.dense[n] = self.dense[n].copy()
+        else:
+            page = self.sparse[n] = self.sparse[n].copy()
+
+        return page
+
+    def _new_page(self):
+        if self.max_pages is not None and self.num_pages() >= self.max_pages:
+            raise MemoryError(f"Intcode memory limit of {self.max_pages} pages reached")
+
+        return [0] * PAGE_SIZE
+
+    def num_pages(self):
+        return len(self.dense) + len(self.sparse)
+
+    def __getitem__(self, addr):
+        if addr < 0:
+            raise IndexError(f"Negative address {addr}")
+
+        try:
+            return self.dense[addr >> PAGE_BITS][addr & PAGE_MASK]
+        except IndexError:
+            page = self.sparse.get(addr >> PAGE_BITS)
+            return 0 if page is None else page[addr & PAGE_MASK]
+
+    def __setitem__(self, addr, value):
+        if addr < 0:
+            raise IndexError(f"Negative address {addr}")
+
+        n = addr >> PAGE_BITS
+        if n < len(self.dense):
+            if self.shared and n in self.shared:
+                self._unshare(n)
+
+            self.dense[n][addr & PAGE_MASK] = value
+            return
+
+        page = self.sparse.get(n)
+        if page is not None and self.shared and n in self.shared:
+            page = self._unshare(n)
+        elif page is None:
+            page = self._new_page()
+            if n == len(self.dense):
+                # Keep growing the dense region while writes stay contiguous
+                self.dense.append(page)
+            else:
+                self.sparse[n] = page
+
+        page[addr & PAGE_MASK] = value
+
+
+def count_pages(*memories):
+    """Number of distinct pages held by `memories`.
+
+    Pages shared copy-on-write between them are only counted once, so this
+    is the real cost of a set of forked machines or snapshots.
+    """
+    return len({id(page) for mem in memories for page in mem.pages()})
@@ -0,0 +1,237 @@
+import atexit
+import json
+import os
+import sys
+import time
+
+from collections import Counter, namedtuple
+
+from .backends import Status, register_backend
+from .compiler import ARITY
+from .interpreter import CachedInterpreter
+
+PROFILE_ENV_VAR = "INTCODE_PROFILE"
+
+MNEMONICS = {
+    1: "add",
+    2: "mul",
+    3: "in",
+    4: "out",
+    5: "jnz",
+    6: "jz",
+    7: "lt",
+    8: "eq",
+    9: "arb",
+    99: "hlt",
+}
+
+
+def _operand(mode, value):
+    if mode == 0:
+        return f"[{value}]"
+    elif mode == 1:
+        return str(value)
+    elif mode == 2:
+        return f"[rb{value:+d}]"
+    else:
+        return f"?{value}"
+
+
+# An instruction as executed: its address, the word there and its text
+Line = namedtuple("Line", ["pc", "word", "text"])
+
+
+def _modes(word):
+    return [word // 100 % 10, word // 1000 % 10, word // 10000 % 10]
+
+
+def disassemble(mem, pc):
+    """Text of the instruction at `pc`, or of the raw word if it is not one."""
+    word = mem[pc]
+    opcode = word % 100
+    if opcode not in ARITY:
+        return f"dw {word}"
+
+    modes = _modes(word)
+    operands = [_operand(modes[i], mem[pc + i + 1]) for i in range(ARITY[opcode])]
+    return " ".join([MNEMONICS[opcode]] + [", ".join(operands)]).rstrip()
+
+
+class Profile:
+    """Execution counts and timings of one or more machines.
+
+    Counts are kept per Line, so code that is overwritten while running is
+    counted as what it was when it executed, and the same code run by
+    different machines adds up. `io_wait` is the time between the machine
+    stopping for input and being resumed, which is time spent in whatever
+    feeds it.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self.run_time = 0.0
+        self.io_wait = 0.0
+        self.io_stops = 0
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        self.run_time += other.run_time
+        self.io_wait += other.io_wait
+        self.io_stops += other.io_stops
+        return self
+
+    def by_opcode(self):
+        counts = Counter()
+        for line, n in self.counts.items():
+            counts[MNEMONICS[line.word % 100]] += n
+
+        return counts
+
+    def by_modes(self):
+        counts = Counter()
+        for line, n in self.counts.items():
+            opcode = line.word % 100
+            modes = "".join(str(m) for m in _modes(line.word)[: ARITY[opcode]])
+            counts[f"{MNEMONICS[opcode]} {modes}".rstrip()] += n
+
+        return counts
+
+    def by_address(self):
+        counts = Counter()
+        for line, n in self.counts.items():
+            counts[line.pc] += n
+
+        return counts
+
+    def report(self):
+        """The profile as a JSON-serialisable dict."""
+        return {
+            "instructions": sum(self.counts.values()),
+            "run_time": self.run_time,
+            "io_wait": self.io_wait,
+            "io_stops": self.io_stops,
+            "opcodes": dict(self.by_opcode().most_common()),
+            "modes": dict(self.by_modes().most_common()),
+            "addresses": {str(pc): n for pc, n in self.by_address().most_common()},
+        }
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+
+    def hot(self, n=20):
+        """Listing of the `n` most executed instructions with disassembly."""
+        total = sum(self.counts.values()) or 1
+        lines = [f"{'addr':>6} {'count':>10} {'%':>6}  instruction"]
+        for line, count in self.counts.most_common(n):
+            lines.append(
+                f"{line.pc:>6} {count:>10} {100 * count / total:>6.2f}  {line.text}"
+            )
+
+        return "\n".join(lines)
+
+
+# Profiles of every profiled machine in this process, merged on exit if
+# $INTCODE_PROFILE names a file to write them to
+profiles = []
+
+
+def collect():
+    """Merge the profiles of every machine profiled so far."""
+    total = Profile()
+    for profile in profiles:
+        total.merge(profile)
+
+    return total
+
+
+def _write_profile():
+    profile = collect()
+    profile.dump(os.environ[PROFILE_ENV_VAR])
+    print(profile.hot(), file=sys.stderr)
+
+
+if os.environ.get(PROFILE_ENV_VAR):
+    atexit.register(_write_profile)
+
+
+@register_backend("profiled")
+class ProfilingInterpreter(CachedInterpreter):
+    """Cached interpreter that records a Profile of what it executes.
+
+    Profiling lives in its own backend so that the others pay nothing for
+    it; select it like any other, e.g. with INTCODE_BACKEND=profiled.
+    """
+
+    def __init__(self, m):
+        super().__init__(m)
+        self.profile = Profile()
+        self.lines = {}
+        self.waiting_since = None
+        # Only added to `profiles` once it runs, as Intcode.fork() creates
+        # a backend it then replaces
+        self.registered = False
+
+    def decode(self, pc):
+        ins = self.decoded.get(pc)
+        if ins is None:
+            ins = super().decode(pc)
+            mem = self.m.mem
+            self.lines[pc] = Line(pc, mem[pc], disassemble(mem, pc))
+
+        return ins
+
+    def fork(self, m):
+        child = super().fork(m)
+        child.lines = dict(self.lines)
+        return child
+
+    def _start(self):
+        if not self.registered:
+            profiles.append(self.profile)
+            self.registered = True
+
+        now = time.perf_counter()
+        if self.waiting_since is not None:
+            self.profile.io_wait += now - self.waiting_since
+            self.waiting_since = None
+
+        return now
+
+    def _stop(self, start):
+        now = time.perf_counter()
+        self.profile.run_time += now - start
+        if self.m.status is Status.INPUT:
+            # The read that found no input didn't execute, and will be
+            # counted when it does
+            self.profile.counts[self.lines[self.m.pc]] -= 1
+            self.profile.io_stops += 1
+            self.waiting_since = now
+
+    def step(self):
+        start = self._start()
+        m = self.m
+        self.decode(m.pc)
+        self.profile.counts[self.lines[m.pc]] += 1
+        status = super().step()
+        self._stop(start)
+        return status
+
+    def run(self):
+        start = self._start()
+        m = self.m
+        decoded = self.decoded
+        lines = self.lines
+        counts = self.profile.counts
+        m.status = None
+        while m.status is None:
+            pc = m.pc
+            ins = decoded.get(pc)
+            if ins is None:
+                ins = self.decode(pc)
+
+            counts[lines[pc]] += 1
+            m.pc += ins.run(m)
+
+        self._stop(start)
+        return m.status
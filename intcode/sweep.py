@@ -0,0 +1,132 @@
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice
+
+from .machine import Intcode
+
+# Memory words to overwrite, as an address to value mapping, and inputs to
+# send before a run
+Assignment = namedtuple("Assignment", ["patch", "inputs"], defaults=(None, ()))
+
+
+def run_assignment(program, assignment):
+    """Run `program` with an Assignment applied, returning the machine."""
+    m = Intcode(program, assignment.inputs)
+    for addr, value in (assignment.patch or {}).items():
+        m.mem[addr] = value
+
+    m.run()
+    return m
+
+
+def _chunks(assignments, size):
+    it = iter(assignments)
+    start = 0
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+
+        yield start, chunk
+        start += len(chunk)
+
+
+# Set in each worker process by _init_worker
+_job = None
+
+
+def _init_worker(program, evaluate, objective, predicate):
+    global _job
+    _job = (program, evaluate, objective, predicate)
+
+
+def _run_chunk(chunk):
+    program, evaluate, objective, predicate = _job
+
+    results = []
+    for assignment in chunk:
+        value = evaluate(program, assignment)
+        if objective is not None:
+            value = objective(value)
+
+        results.append(value)
+        if predicate is not None and predicate(value):
+            break
+
+    return results
+
+
+def _pool(program, evaluate, objective, predicate, workers):
+    return ProcessPoolExecutor(
+        workers,
+        initializer=_init_worker,
+        initargs=(program, evaluate, objective, predicate),
+    )
+
+
+def sweep(
+    program,
+    assignments,
+    objective=None,
+    evaluate=run_assignment,
+    workers=None,
+    chunksize=64,
+):
+    """Evaluate every assignment of `program` across a process pool.
+
+    Each assignment is run with `evaluate(program, assignment)`, by default
+    an Assignment applied to a fresh machine, and scored with
+    `objective(result)` if one is given. Results are returned in the order
+    of `assignments`. The functions are sent to worker processes, so they
+    must be defined at module level.
+    """
+    with _pool(program, evaluate, objective, None, workers) as pool:
+        results = []
+        for chunk_results in pool.map(
+            _run_chunk, (chunk for _, chunk in _chunks(assignments, chunksize))
+        ):
+            results.extend(chunk_results)
+
+    return results
+
+
+def search(
+    program,
+    assignments,
+    predicate,
+    objective=None,
+    evaluate=run_assignment,
+    workers=None,
+    chunksize=64,
+):
+    """Find the first assignment whose result satisfies `predicate`.
+
+    Runs like sweep(), but as soon as a match is found any chunk after it
+    that has not started yet is cancelled. Chunks before it still run, so
+    the match returned is the first in order. Returns an (index,
+    assignment, result) tuple, or None if nothing matches.
+    """
+    with _pool(program, evaluate, objective, predicate, workers) as pool:
+        futures = {
+            pool.submit(_run_chunk, chunk): (start, chunk)
+            for start, chunk in _chunks(assignments, chunksize)
+        }
+
+        best = None
+        for f in as_completed(futures):
+            if f.cancelled():
+                continue
+
+            start, chunk = futures[f]
+            results = f.result()
+            if not results or not predicate(results[-1]):
+                continue
+
+            index = start + len(results) - 1
+            if best is None or index < best[0]:
+                best = (index, chunk[len(results) - 1], results[-1])
+                for other, (other_start, _) in futures.items():
+                    if other_start > start:
+                        other.cancel()
+
+    return best
@@ -0,0 +1,116 @@
+import hashlib
+import mmap
+import os
+import struct
+
+from array import array
+from pathlib import Path
+
+MAGIC = b"INTS"
+
+# Magic, input mtime in ns, input size, SHA-256 of the input, key of the
+# separator it was split on, number of values; the values follow as native
+# 64-bit ints
+HEADER = struct.Struct("=4sqq32s8sq")
+DATA_OFFSET = 128
+
+
+def cache_path(path):
+    return path.with_name(f".{path.name}.ints")
+
+
+def _sep_key(sep):
+    return hashlib.sha256(repr(sep).encode()).digest()[:8]
+
+
+def _parse(data, sep):
+    return [int(n) for n in data.decode().split(sep)]
+
+
+def _map(cache, st, data, sep):
+    """The cached values if `cache` is valid for the input, else None.
+
+    The input's size and mtime are checked first, and only if they changed
+    is it hashed, so a cache survives the input being rewritten as it was.
+    """
+    try:
+        with open(cache, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(mm) < DATA_OFFSET:
+        return None
+
+    magic, mtime, size, digest, sep_key, count = HEADER.unpack_from(mm)
+    if magic != MAGIC or len(mm) != DATA_OFFSET + 8 * count:
+        return None
+
+    if sep_key != _sep_key(sep):
+        return None
+
+    if (mtime, size) != (st.st_mtime_ns, st.st_size):
+        if data is None or digest != hashlib.sha256(data).digest():
+            return None
+
+    return memoryview(mm)[DATA_OFFSET:].cast("q")
+
+
+def _write(cache, st, data, sep, values):
+    digest = hashlib.sha256(data).digest()
+    header = HEADER.pack(
+        MAGIC, st.st_mtime_ns, st.st_size, digest, _sep_key(sep), len(values)
+    )
+    tmp = cache.with_name(f"{cache.name}.{os.getpid()}")
+    with open(tmp, "wb") as f:
+        f.write(header.ljust(DATA_OFFSET, b"\0"))
+        values.tofile(f)
+
+    # Replace rather than rewrite, so that readers still mapping the old
+    # cache are left alone
+    os.replace(tmp, cache)
+
+
+def map_ints(path, sep=None):
+    """Integers in the file at `path`, split on `sep`, parsed only once.
+
+    The parsed values are kept in a binary cache next to the file and
+    mapped into memory on later calls, which return a read-only memoryview
+    of them; processes mapping the same cache share its pages. Inputs with
+    values that don't fit 64 bits, or whose cache can't be written, are
+    parsed every time and returned as a list.
+    """
+    path = Path(path)
+    cache = cache_path(path)
+    st = path.stat()
+
+    values = _map(cache, st, None, sep)
+    if values is not None:
+        return values
+
+    with open(path, "rb") as f:
+        data = f.read()
+
+    values = _map(cache, st, data, sep)
+    if values is not None:
+        try:
+            # Same contents under a new mtime, so refresh the header
+            _write(cache, st, data, sep, array("q", values))
+        except OSError:
+            pass
+
+        return values
+
+    parsed = _parse(data, sep)
+    try:
+        _write(cache, st, data, sep, array("q", parsed))
+    except (OverflowError, OSError):
+        return parsed
+
+    return _map(cache, st, None, sep) or parsed
+
+
+def load_ints(path, sep=None):
+    """Like map_ints(), but as a list."""
+    values = map_ints(path, sep)
+    return values.tolist() if isinstance(values, memoryview) else values
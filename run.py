@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+from multiprocessing.connection import wait
+
+from days import Result, check, find_days, measure_day
+
+
+def _measure_child(conn, n):
+    # In a process group of its own, so that killing it takes any pool
+    # workers it started along with it
+    os.setpgid(0, 0)
+    with conn:
+        conn.send(measure_day(n))
+
+
+def _kill(process):
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        process.kill()
+
+
+def _run_forked(days, jobs, timeout):
+    # Forked rather than spawned, so that days starting process pools of
+    # their own fork them too, and their workers inherit the day's module
+    ctx = multiprocessing.get_context("fork")
+    days = list(days)
+    running = {}
+    results = {}
+    started = 0
+    for i in range(len(days)):
+        while i not in results:
+            while started < len(days) and len(running) < jobs:
+                reader, writer = ctx.Pipe(duplex=False)
+                process = ctx.Process(
+                    target=_measure_child, args=(writer, days[started])
+                )
+                # Anything still buffered would be printed again by the child
+                sys.stdout.flush()
+                sys.stderr.flush()
+                process.start()
+                writer.close()
+                try:
+                    # Also set here, in case the child hasn't got to it yet
+                    os.setpgid(process.pid, process.pid)
+                except OSError:
+                    pass
+
+                start = time.perf_counter()
+                running[reader] = (started, process, start)
+                started += 1
+
+            left = None
+            if timeout:
+                earliest = min(start for _, _, start in running.values())
+                left = max(0.0, earliest + timeout - time.perf_counter())
+
+            for reader in wait(list(running), left):
+                j, process, start = running.pop(reader)
+                try:
+                    results[j] = reader.recv()
+                except EOFError:
+                    process.join()
+                    error = f"worker exited with code {process.exitcode}"
+                    elapsed = time.perf_counter() - start
+                    results[j] = Result(days[j], "", elapsed, 0, error)
+
+                reader.close()
+                process.join()
+
+            # The day itself can't always be interrupted, so kill it
+            now = time.perf_counter()
+            for reader, (j, process, start) in list(running.items()):
+                if timeout and now - start >= timeout:
+                    _kill(process)
+                    process.join()
+                    reader.close()
+                    del running[reader]
+                    error = f"timed out after {timeout}s"
+                    results[j] = Result(days[j], "", now - start, 0, error)
+
+        yield results.pop(i)
+
+
+def run_days(days, jobs=None, timeout=None):
+    """Run `days`, yielding a Result for each in order.
+
+    With `jobs`, days run in up to that many processes at once, each day in
+    a fresh one forked from this process so that its peak memory is its
+    own. Otherwise they all run in this process, and peak memory is the
+    highest seen so far. A `timeout` is enforced by killing the day's
+    process, so with one each day runs in its own process even without
+    `jobs`.
+    """
+    if jobs or timeout:
+        yield from _run_forked(days, jobs or 1, timeout)
+    else:
+        yield from map(measure_day, days)
+
+
+def status(result):
+    if result.error is not None:
+        return "timeout" if result.error.startswith("timed out") else "error"
+
+    return {True: "ok", False: "wrong answer", None: "unchecked"}[
+        check(result.day, result.output)
+    ]
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Run the Python solutions")
+    parser.add_argument("days", nargs="*", type=int, help="days to run, all by default")
+    parser.add_argument(
+        "-j", "--jobs", type=int, help="worker processes, run in this process if unset"
+    )
+    parser.add_argument("--timeout", type=float, help="seconds allowed for each day")
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="only print the summary"
+    )
+    args = parser.parse_args(argv[1:])
+
+    results = []
+    for result in run_days(args.days or find_days(), args.jobs, args.timeout):
+        results.append(result)
+        if not args.quiet:
+            print(f"--- day {result.day}")
+            print(result.output, end="")
+            if result.error is not None:
+                print(result.error.rstrip(), file=sys.stderr)
+
+    print(f"{'day':>4} {'time':>10} {'peak rss':>10}  status")
+    for result in results:
+        print(
+            f"{result.day:>4} {1000 * result.time:>8.1f}ms"
+            f" {result.peak_rss / 1024:>8.1f}MB  {status(result)}"
+        )
+
+    failed = {"error", "timeout", "wrong answer"}
+    return 1 if any(status(result) in failed for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,11 @@
+import pytest
+
+from intcode import Intcode, Status
+
+
+@pytest.mark.parametrize("backend", ["reference", "cached", "compiled"])
+def test_patched_invalid_mode(backend):
+    # The add patches the output's invalid mode 3 to 1 before it is reached
+    m = Intcode([1101, 100, 4, 4, 304, 42, 99], backend=backend)
+    assert m.run() == Status.HALTED
+    assert list(m.outputs) == [42]